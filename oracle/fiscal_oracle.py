@@ -37,18 +37,84 @@ Data: Fevereiro/2026
 from web3 import Web3
 from eth_account import Account
 from eth_account.messages import encode_defunct
+from eth_utils import keccak
+from eth_hash.auto import keccak as keccak_hasher
+from eth_keys import keys as eth_keys
+import numpy as np
 from dataclasses import dataclass, field
-from typing import Optional, Dict, Tuple
+from typing import Optional, Dict, Iterable, List, Tuple, Union
 from datetime import datetime
+from enum import IntEnum
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor
+import os
 import secrets
 import json
 import sys
 
+try:
+    # libsecp256k1 (C); sem ele a assinatura cai no eth_keys do eth_account
+    import coincurve
+except ImportError:
+    coincurve = None
+
 
 # ============================================================================
 # 1. MOTOR DE REGRAS TRIBUTÁRIAS (TaxEngine)
 # ============================================================================
 
+class Sector(IntEnum):
+    """Setores com alíquota diferenciada; o valor indexa as tabelas de bps."""
+    PADRAO = 0
+    SAUDE = 1
+    EDUCACAO = 2
+    TRANSPORTE_COLETIVO = 3
+    CESTA_BASICA = 4
+    COMBUSTIVEIS = 5
+
+
+# Alíquotas diferenciadas por setor (Art. 278 e seguintes, LC 214/2025)
+# Em basis points (CBS, IBS_ESTADO, IBS_MUNICIPIO), como no contrato; índice = Sector
+SECTOR_RATES_BPS = (
+    (865, 1115, 470),   # PADRAO
+    (433, 558, 235),    # SAUDE
+    (433, 558, 235),    # EDUCACAO
+    (433, 558, 235),    # TRANSPORTE_COLETIVO
+    (0, 0, 0),          # CESTA_BASICA
+    (865, 1115, 470),   # COMBUSTIVEIS
+)
+
+# Alíquotas simplificadas por setor (Art. 33 - basis points); índice = Sector
+SIMPLIFIED_RATES_BPS = (
+    2650,   # PADRAO
+    1325,   # SAUDE
+    1325,   # EDUCACAO
+    1325,   # TRANSPORTE_COLETIVO
+    0,      # CESTA_BASICA
+    2650,   # COMBUSTIVEIS
+)
+
+# Soma CBS + IBS_ESTADO + IBS_MUNICIPIO por setor, pré-calculada; índice = Sector
+SECTOR_TOTAL_BPS = tuple(sum(rates) for rates in SECTOR_RATES_BPS)
+
+_NAME_TO_ID = {s.name: s for s in Sector}
+
+
+def _sector_id(sector) -> Sector:
+    """
+    Aceita nome do setor, Sector ou código inteiro.
+
+    Nomes desconhecidos caem em PADRAO; códigos inteiros fora da tabela e
+    qualquer outro tipo (float, bool, ...) levantam ValueError (nunca são
+    precificados como PADRAO nem truncados).
+    """
+    if isinstance(sector, str):
+        return _NAME_TO_ID.get(sector, Sector.PADRAO)
+    if isinstance(sector, (int, np.integer)) and not isinstance(sector, (bool, np.bool_)):
+        return Sector(int(sector))
+    raise ValueError(f"Setor inválido: {sector!r}")
+
+
 class TaxEngine:
     """
     Motor de regras tributárias simplificado.
@@ -72,31 +138,50 @@ class TaxEngine:
         "IBS_MUNICIPIO": 0.0470, # ~4.70% (municipal)
     }
 
-    # Alíquotas diferenciadas por setor (Art. 278 e seguintes, LC 214/2025)
-    SECTOR_RATES = {
-        "PADRAO": {"CBS": 0.0865, "IBS_ESTADO": 0.1115, "IBS_MUNICIPIO": 0.0470},
-        "SAUDE": {"CBS": 0.0433, "IBS_ESTADO": 0.0558, "IBS_MUNICIPIO": 0.0235},
-        "EDUCACAO": {"CBS": 0.0433, "IBS_ESTADO": 0.0558, "IBS_MUNICIPIO": 0.0235},
-        "TRANSPORTE_COLETIVO": {"CBS": 0.0433, "IBS_ESTADO": 0.0558, "IBS_MUNICIPIO": 0.0235},
-        "CESTA_BASICA": {"CBS": 0.0, "IBS_ESTADO": 0.0, "IBS_MUNICIPIO": 0.0},
-        "COMBUSTIVEIS": {"CBS": 0.0865, "IBS_ESTADO": 0.1115, "IBS_MUNICIPIO": 0.0470},
-    }
+    # Tabelas NumPy para as variantes em lote (linhas indexadas por Sector)
+    RATE_TABLE_BPS = np.array(SECTOR_RATES_BPS, dtype=np.int64)
+    SIMPLIFIED_RATE_TABLE_BPS = np.array(SIMPLIFIED_RATES_BPS, dtype=np.int64)
 
-    # Alíquotas simplificadas por setor (Art. 33 - basis points)
-    SIMPLIFIED_RATES_BPS = {
-        "PADRAO": 2650,
-        "SAUDE": 1325,
-        "EDUCACAO": 1325,
-        "TRANSPORTE_COLETIVO": 1325,
-        "CESTA_BASICA": 0,
-        "COMBUSTIVEIS": 2650,
-    }
+    # Maior valor bruto cujo produto por bps (<= 10000) ainda cabe em int64
+    _INT64_SAFE_WEI = int(np.iinfo(np.int64).max) // 10000
+
+    @classmethod
+    def _as_wei_array(cls, values) -> np.ndarray:
+        """
+        Converte valores em wei para array NumPy.
+
+        Valores reais em wei (R$ 1.000 = 10^21) excedem int64 (em módulo,
+        inclusive negativos); nesse caso o array usa dtype=object (inteiros
+        Python) para manter a aritmética exata.
+        """
+        arr = np.asarray(values)
+        if arr.size == 0:
+            return arr.astype(np.int64)
+        if arr.dtype.kind in "iu" and max(
+            abs(int(arr.min())), abs(int(arr.max()))
+        ) > cls._INT64_SAFE_WEI:
+            arr = arr.astype(object)
+        return arr
+
+    @classmethod
+    def _as_sector_array(cls, sectors) -> np.ndarray:
+        """Valida códigos Sector do lote; códigos inválidos levantam ValueError, como na versão escalar."""
+        arr = np.asarray(sectors)
+        if arr.size == 0:
+            # Lote vazio vindo de lista: np.asarray([]) é float64
+            return arr.astype(np.int64)
+        if arr.dtype.kind not in "iu":
+            raise ValueError("sectors deve conter códigos Sector inteiros")
+        invalid = (arr < 0) | (arr >= len(Sector))
+        if invalid.any():
+            raise ValueError(f"Códigos de setor inválidos: {np.unique(arr[invalid]).tolist()}")
+        return arr
 
     @classmethod
     def calculate_standard(
         cls,
         gross_amount_wei: int,
-        sector: str = "PADRAO",
+        sector: Union[str, Sector] = "PADRAO",
         seller_credits_wei: int = 0
     ) -> Dict:
         """
@@ -104,11 +189,13 @@ class TaxEngine:
         
         Retorna dicionário com todas as parcelas e o crédito a compensar.
         """
-        rates = cls.SECTOR_RATES.get(sector, cls.SECTOR_RATES["PADRAO"])
+        sector_id = _sector_id(sector)
+        cbs_bps, ibs_s_bps, ibs_m_bps = SECTOR_RATES_BPS[sector_id]
 
-        cbs_amount = int(gross_amount_wei * rates["CBS"])
-        ibs_state_amount = int(gross_amount_wei * rates["IBS_ESTADO"])
-        ibs_city_amount = int(gross_amount_wei * rates["IBS_MUNICIPIO"])
+        # Aritmética inteira (gross * bps // 10000), espelhando o contrato
+        cbs_amount = gross_amount_wei * cbs_bps // 10000
+        ibs_state_amount = gross_amount_wei * ibs_s_bps // 10000
+        ibs_city_amount = gross_amount_wei * ibs_m_bps // 10000
         total_tax = cbs_amount + ibs_state_amount + ibs_city_amount
 
         # Compensação de créditos (Art. 32, §2º)
@@ -125,21 +212,22 @@ class TaxEngine:
             "credit_offset": credit_offset,
             "net_tax": net_tax,
             "net_to_seller": net_to_seller,
-            "effective_rate": total_tax / gross_amount_wei if gross_amount_wei > 0 else 0,
-            "sector": sector,
+            "effective_rate": SECTOR_TOTAL_BPS[sector_id] / 10000,
+            "sector": sector if isinstance(sector, str) else sector_id.name,
         }
 
     @classmethod
     def calculate_simplified(
         cls,
         gross_amount_wei: int,
-        sector: str = "PADRAO"
+        sector: Union[str, Sector] = "PADRAO"
     ) -> Dict:
         """
         Calcula tributos para o Split Simplificado (Art. 33).
         """
-        rate_bps = cls.SIMPLIFIED_RATES_BPS.get(sector, 2650)
-        tax_amount = int(gross_amount_wei * rate_bps / 10000)
+        sector_id = _sector_id(sector)
+        rate_bps = SIMPLIFIED_RATES_BPS[sector_id]
+        tax_amount = gross_amount_wei * rate_bps // 10000
         net_to_seller = gross_amount_wei - tax_amount
 
         return {
@@ -148,7 +236,68 @@ class TaxEngine:
             "tax_amount": tax_amount,
             "net_to_seller": net_to_seller,
             "effective_rate": rate_bps / 10000,
-            "sector": sector,
+            "sector": sector if isinstance(sector, str) else sector_id.name,
+        }
+
+    @classmethod
+    def calculate_standard_batch(
+        cls,
+        gross_wei: np.ndarray,
+        sectors: np.ndarray,
+        credits_wei: np.ndarray,
+    ) -> Dict[str, np.ndarray]:
+        """
+        Variante vetorizada de calculate_standard para lotes de NF-e.
+
+        `sectors` contém códigos Sector (inteiros); códigos fora da tabela
+        levantam ValueError. Retorna um dicionário
+        de arrays (uma entrada por NF-e) com as mesmas chaves da versão escalar.
+        """
+        gross = cls._as_wei_array(gross_wei)
+        credits = cls._as_wei_array(credits_wei)
+        sectors = cls._as_sector_array(sectors)
+        rows = cls.RATE_TABLE_BPS[sectors]
+
+        taxes = (gross[:, None] * rows) // 10000
+        total_tax = taxes.sum(axis=1)
+
+        credit_offset = np.minimum(credits, total_tax)
+        net_tax = total_tax - credit_offset
+
+        return {
+            "gross_amount": gross,
+            "cbs_amount": taxes[:, 0],
+            "ibs_state_amount": taxes[:, 1],
+            "ibs_city_amount": taxes[:, 2],
+            "total_tax": total_tax,
+            "credit_offset": credit_offset,
+            "net_tax": net_tax,
+            "net_to_seller": gross - net_tax,
+            "effective_rate": rows.sum(axis=1) / 10000,
+            "sector": sectors,
+        }
+
+    @classmethod
+    def calculate_simplified_batch(
+        cls,
+        gross_wei: np.ndarray,
+        sectors: np.ndarray,
+    ) -> Dict[str, np.ndarray]:
+        """
+        Variante vetorizada de calculate_simplified para lotes de NF-e.
+        """
+        gross = cls._as_wei_array(gross_wei)
+        sectors = cls._as_sector_array(sectors)
+        rate_bps = cls.SIMPLIFIED_RATE_TABLE_BPS[sectors]
+        tax_amount = (gross * rate_bps) // 10000
+
+        return {
+            "gross_amount": gross,
+            "rate_bps": rate_bps,
+            "tax_amount": tax_amount,
+            "net_to_seller": gross - tax_amount,
+            "effective_rate": rate_bps / 10000,
+            "sector": sectors,
         }
 
 
@@ -156,7 +305,12 @@ class TaxEngine:
 # 2. ASSINADOR CRIPTOGRÁFICO (FiscalOracle)
 # ============================================================================
 
-@dataclass
+# slots=True só existe a partir do Python 3.10; em 3.9 a classe mantém __dict__
+# (__slots__ manual conflita com o valor padrão de rate_bps)
+_DATACLASS_SLOTS = {"slots": True} if sys.version_info >= (3, 10) else {}
+
+
+@dataclass(**_DATACLASS_SLOTS)
 class SignedInvoice:
     """Resultado da assinatura de uma NF-e pelo oráculo fiscal."""
     invoice_id: str
@@ -172,6 +326,147 @@ class SignedInvoice:
     mode: str  # "STANDARD" ou "SIMPLIFIED"
     # Campos extras para simplificado
     rate_bps: int = 0
+    # Detalhamento completo do TaxEngine usado na autorização
+    tax: Dict = field(default_factory=dict)
+
+
+# Sufixo fixo do hash simplificado (literal "SIMPLIFIED" no abi.encodePacked)
+_MODE_SIMPLIFIED = b"SIMPLIFIED"
+
+
+@lru_cache(maxsize=100_000)
+def _addr_to_bytes(addr_hex: str) -> bytes:
+    """
+    Endereço hex -> 20 bytes; cacheado porque um vendedor emite muitas NF-e.
+
+    Levanta ValueError para endereços que não tenham exatamente 20 bytes
+    (exceções não são cacheadas pelo lru_cache).
+    """
+    addr_bytes = bytes.fromhex(addr_hex[2:] if addr_hex.startswith("0x") else addr_hex)
+    if len(addr_bytes) != 20:
+        raise ValueError(f"Endereço inválido (esperado 20 bytes): {addr_hex}")
+    return addr_bytes
+
+
+def _pack_standard(invoice_id: str, seller_address: str, gross_amount_wei: int, tax: Dict) -> bytes:
+    """
+    Empacota os dados do Split Padrão (DEVE espelhar _computeInvoiceHash do Solidity).
+
+    Bytes montados manualmente conforme abi.encodePacked:
+    string = UTF-8 cru, address = 20 bytes, uint256 = 32 bytes big-endian.
+    Layout fixo escrito por fatias em um único buffer pré-alocado.
+    """
+    invoice_id_bytes = invoice_id.encode()
+    lid = len(invoice_id_bytes)
+    buf = bytearray(lid + 20 + 5 * 32)
+    buf[0:lid] = invoice_id_bytes
+    buf[lid:lid + 20] = _addr_to_bytes(seller_address)
+    off = lid + 20
+    for value in (
+        gross_amount_wei,
+        tax["cbs_amount"],
+        tax["ibs_state_amount"],
+        tax["ibs_city_amount"],
+        tax["credit_offset"],
+    ):
+        buf[off:off + 32] = value.to_bytes(32, "big")
+        off += 32
+    return bytes(buf)
+
+
+def _pack_simplified(invoice_id: str, seller_address: str, gross_amount_wei: int, tax: Dict) -> bytes:
+    """Espelha abi.encodePacked(invoiceId, seller, grossAmount, simplifiedRate, "SIMPLIFIED")."""
+    return b"".join([
+        invoice_id.encode(),
+        _addr_to_bytes(seller_address),
+        gross_amount_wei.to_bytes(32, "big"),
+        tax["rate_bps"].to_bytes(32, "big"),
+        _MODE_SIMPLIFIED,
+    ])
+
+
+def _check_packing_matches_solidity():
+    """
+    Verificação única: os empacotadores manuais devem gerar exatamente o
+    mesmo hash que Web3.solidity_keccak (referência de abi.encodePacked).
+    """
+    invoice_id = "NFe-conferência"
+    seller_address = "0x1234567890123456789012345678901234567890"
+    standard_tax = {
+        "cbs_amount": 86_500_000_000_000_000_000,
+        "ibs_state_amount": 111_500_000_000_000_000_000,
+        "ibs_city_amount": 47_000_000_000_000_000_000,
+        "credit_offset": 50_000_000_000_000_000_000,
+    }
+    gross_amount_wei = 1_000_000_000_000_000_000_000
+    expected = Web3.solidity_keccak(
+        ['string', 'address', 'uint256', 'uint256', 'uint256', 'uint256', 'uint256'],
+        [
+            invoice_id,
+            seller_address,
+            gross_amount_wei,
+            standard_tax["cbs_amount"],
+            standard_tax["ibs_state_amount"],
+            standard_tax["ibs_city_amount"],
+            standard_tax["credit_offset"],
+        ]
+    )
+    if keccak(_pack_standard(invoice_id, seller_address, gross_amount_wei, standard_tax)) != expected:
+        raise RuntimeError("_pack_standard diverge de abi.encodePacked")
+
+    expected = Web3.solidity_keccak(
+        ['string', 'address', 'uint256', 'uint256', 'string'],
+        [invoice_id, seller_address, gross_amount_wei, 2650, "SIMPLIFIED"]
+    )
+    if keccak(_pack_simplified(invoice_id, seller_address, gross_amount_wei, {"rate_bps": 2650})) != expected:
+        raise RuntimeError("_pack_simplified diverge de abi.encodePacked")
+
+
+# Prefixo EIP-191 para hashes de 32 bytes (toEthSignedMessageHash)
+_EIP191_PREFIX = b"\x19Ethereum Signed Message:\n32"
+
+
+def _make_sign_key(key_bytes: bytes):
+    """
+    Chave de assinatura a partir dos 32 bytes crus da chave privada:
+    coincurve se disponível, senão eth_keys.
+    """
+    if len(key_bytes) != 32:
+        raise ValueError(f"Chave privada deve ter 32 bytes, recebido {len(key_bytes)}")
+    if coincurve is not None:
+        return coincurve.PrivateKey(key_bytes)
+    return eth_keys.PrivateKey(key_bytes)
+
+
+def _sign_eip191(key, message_hash: bytes) -> bytes:
+    """
+    Assina o hash no formato EIP-191 (personal_sign), compatível com
+    ECDSA.recover + toEthSignedMessageHash do contrato.
+
+    Retorna 65 bytes r || s || v, com v em {27, 28}.
+    """
+    h = keccak_hasher.new(_EIP191_PREFIX)
+    h.update(message_hash)
+    eip191_digest = h.digest()
+    if coincurve is not None:
+        sig = key.sign_recoverable(eip191_digest, hasher=None)
+    else:
+        sig = key.sign_msg_hash(eip191_digest).to_bytes()
+    return sig[:64] + bytes([sig[64] + 27])
+
+
+# Chave do processo worker em authorize_batch (uma por processo, via initializer)
+_worker_key = None
+
+
+def _init_sign_worker(key_bytes: bytes):
+    global _worker_key
+    _worker_key = _make_sign_key(key_bytes)
+
+
+def _sign_worker(item: Tuple[str, bytes]) -> bytes:
+    _invoice_id, message_hash = item
+    return _sign_eip191(_worker_key, message_hash)
 
 
 class FiscalOracle:
@@ -200,14 +495,42 @@ class FiscalOracle:
 
         self.account = Account.from_key(self.private_key)
         self.address = self.account.address
+        # Chave usada no caminho de assinatura (libsecp256k1 quando disponível)
+        # Deriva dos 32 bytes já validados pelo eth_account (aceita chave com ou sem 0x)
+        self._sign_key = _make_sign_key(bytes(self.account.key))
+        self._check_sign_key()
         self.signatures_issued = 0
 
+    def _check_sign_key(self):
+        """Garante que as assinaturas emitidas recuperam para self.address."""
+        message_hash = bytes(32)
+        signature = _sign_eip191(self._sign_key, message_hash)
+        recovered = Account.recover_message(encode_defunct(primitive=message_hash), signature=signature)
+        if recovered != self.address:
+            raise ValueError(
+                f"Chave de assinatura inconsistente: assina como {recovered}, esperado {self.address}"
+            )
+
+    def warm_up(self, seller_addresses: Iterable[str] = ()):
+        """
+        Paga os custos únicos antes da primeira NF-e.
+
+        Produtores devem chamar no início do processo: confere o
+        empacotamento contra Web3.solidity_keccak, exercita a chave de
+        assinatura e pré-popula o cache de endereços dos vendedores
+        informados. Não conta como assinatura emitida.
+        """
+        _check_packing_matches_solidity()
+        _sign_eip191(self._sign_key, bytes(32))
+        for seller_address in seller_addresses:
+            _addr_to_bytes(seller_address)
+
     def authorize_standard(
         self,
         invoice_id: str,
         seller_address: str,
         gross_amount_wei: int,
-        sector: str = "PADRAO",
+        sector: Union[str, Sector] = "PADRAO",
         seller_credits_wei: int = 0
     ) -> SignedInvoice:
         """
@@ -217,22 +540,10 @@ class FiscalOracle:
         tax = TaxEngine.calculate_standard(gross_amount_wei, sector, seller_credits_wei)
 
         # 2. Empacotamento (DEVE espelhar _computeInvoiceHash do Solidity)
-        message_hash = Web3.solidity_keccak(
-            ['string', 'address', 'uint256', 'uint256', 'uint256', 'uint256', 'uint256'],
-            [
-                invoice_id,
-                seller_address,
-                gross_amount_wei,
-                tax["cbs_amount"],
-                tax["ibs_state_amount"],
-                tax["ibs_city_amount"],
-                tax["credit_offset"],
-            ]
-        )
+        message_hash = keccak(_pack_standard(invoice_id, seller_address, gross_amount_wei, tax))
 
         # 3. Assinatura EIP-191
-        message = encode_defunct(hexstr=message_hash.hex())
-        signed = self.account.sign_message(message)
+        signature = _sign_eip191(self._sign_key, message_hash)
 
         self.signatures_issued += 1
 
@@ -244,10 +555,11 @@ class FiscalOracle:
             ibs_state_amount=tax["ibs_state_amount"],
             ibs_city_amount=tax["ibs_city_amount"],
             credit_offset=tax["credit_offset"],
-            signature="0x" + signed.signature.hex(),
+            signature="0x" + signature.hex(),
             signer_address=self.address,
-            timestamp=datetime.now().isoformat(),
+            timestamp=datetime.now().isoformat(timespec="seconds"),
             mode="STANDARD",
+            tax=tax,
         )
 
     def authorize_simplified(
@@ -255,20 +567,16 @@ class FiscalOracle:
         invoice_id: str,
         seller_address: str,
         gross_amount_wei: int,
-        sector: str = "PADRAO"
+        sector: Union[str, Sector] = "PADRAO"
     ) -> SignedInvoice:
         """
         Autoriza uma transação com Split Simplificado (Art. 33).
         """
         tax = TaxEngine.calculate_simplified(gross_amount_wei, sector)
 
-        message_hash = Web3.solidity_keccak(
-            ['string', 'address', 'uint256', 'uint256', 'string'],
-            [invoice_id, seller_address, gross_amount_wei, tax["rate_bps"], "SIMPLIFIED"]
-        )
+        message_hash = keccak(_pack_simplified(invoice_id, seller_address, gross_amount_wei, tax))
 
-        message = encode_defunct(hexstr=message_hash.hex())
-        signed = self.account.sign_message(message)
+        signature = _sign_eip191(self._sign_key, message_hash)
 
         self.signatures_issued += 1
 
@@ -280,102 +588,193 @@ class FiscalOracle:
             ibs_state_amount=0,
             ibs_city_amount=0,
             credit_offset=0,
-            signature="0x" + signed.signature.hex(),
+            signature="0x" + signature.hex(),
             signer_address=self.address,
-            timestamp=datetime.now().isoformat(),
+            timestamp=datetime.now().isoformat(timespec="seconds"),
             mode="SIMPLIFIED",
             rate_bps=tax["rate_bps"],
+            tax=tax,
         )
 
+    def authorize_batch(
+        self,
+        items: List[Dict],
+        mode: str = "STANDARD",
+        timestamp: Optional[str] = None
+    ) -> List[SignedInvoice]:
+        """
+        Autoriza um lote de NF-e distribuindo as assinaturas ECDSA entre
+        os núcleos disponíveis.
+
+        Cada item é um dicionário com os mesmos argumentos de
+        authorize_standard / authorize_simplified. O cálculo tributário e o
+        empacotamento ocorrem no processo principal; apenas (invoice_id, hash)
+        trafega para os workers, que devolvem a assinatura de 65 bytes.
+
+        Todas as NF-e do lote compartilham o mesmo timestamp.
+        """
+        if timestamp is None:
+            timestamp = datetime.now().isoformat(timespec="seconds")
+
+        if mode == "STANDARD":
+            taxes = [
+                TaxEngine.calculate_standard(
+                    item["gross_amount_wei"],
+                    item.get("sector", "PADRAO"),
+                    item.get("seller_credits_wei", 0),
+                )
+                for item in items
+            ]
+            pack = _pack_standard
+        elif mode == "SIMPLIFIED":
+            taxes = [
+                TaxEngine.calculate_simplified(item["gross_amount_wei"], item.get("sector", "PADRAO"))
+                for item in items
+            ]
+            pack = _pack_simplified
+        else:
+            raise ValueError(f"Modo desconhecido: {mode}")
+
+        if not items:
+            return []
+
+        digests = [
+            (item["invoice_id"], keccak(pack(item["invoice_id"], item["seller_address"], item["gross_amount_wei"], tax)))
+            for item, tax in zip(items, taxes)
+        ]
+
+        # Lotes pequenos não justificam processos ociosos
+        workers = min(os.cpu_count() or 1, len(digests))
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_sign_worker,
+            initargs=(bytes(self.account.key),),
+        ) as pool:
+            chunksize = max(1, len(digests) // (workers * 4))
+            signatures = list(pool.map(_sign_worker, digests, chunksize=chunksize))
+
+        self.signatures_issued += len(signatures)
+
+        results = []
+        for item, tax, signature in zip(items, taxes, signatures):
+            results.append(SignedInvoice(
+                invoice_id=item["invoice_id"],
+                seller=item["seller_address"],
+                gross_amount=item["gross_amount_wei"],
+                cbs_amount=tax.get("cbs_amount", 0),
+                ibs_state_amount=tax.get("ibs_state_amount", 0),
+                ibs_city_amount=tax.get("ibs_city_amount", 0),
+                credit_offset=tax.get("credit_offset", 0),
+                signature="0x" + signature.hex(),
+                signer_address=self.address,
+                timestamp=timestamp,
+                mode=mode,
+                rate_bps=tax.get("rate_bps", 0),
+                tax=tax,
+            ))
+        return results
+
 
 # ============================================================================
 # 3. FORMATAÇÃO E RELATÓRIO
 # ============================================================================
 
 def wei_to_brl(wei: int) -> str:
-    """Converte wei para formato monetário BRL."""
-    value = wei / (10 ** 18)
-    return f"R$ {value:,.2f}"
+    """Converte wei para formato monetário BRL (aritmética inteira, trunca centavos)."""
+    sign = "-" if wei < 0 else ""
+    cents = abs(wei) // 10**16  # wei → centavos
+    reais, centavos = divmod(cents, 100)
+    return f"R$ {sign}{reais:,}.{centavos:02d}"
 
 
 def print_header():
-    print()
-    print("=" * 70)
-    print("  ORÁCULO FISCAL SIMULADO — SEFAZ / RFB")
-    print("  Split Payment Tributário — LC 214/2025")
-    print("  Prova de Conceito — Fevereiro/2026")
-    print("=" * 70)
-
-
-def print_standard_report(result: SignedInvoice, tax_details: Dict):
-    print()
-    print("-" * 70)
-    print(f"  AUTORIZAÇÃO DE SPLIT PADRÃO (Art. 32)")
-    print("-" * 70)
-    print(f"  NF-e:                {result.invoice_id}")
-    print(f"  Vendedor:            {result.seller[:10]}...{result.seller[-8:]}")
-    print(f"  Timestamp:           {result.timestamp}")
-    print(f"  Setor:               {tax_details['sector']}")
-    print()
-    print(f"  Valor bruto:         {wei_to_brl(result.gross_amount)}")
-    print(f"  ├─ CBS (União):      {wei_to_brl(result.cbs_amount)}")
-    print(f"  ├─ IBS Estado:       {wei_to_brl(result.ibs_state_amount)}")
-    print(f"  ├─ IBS Município:    {wei_to_brl(result.ibs_city_amount)}")
+    lines = []
+    lines.append("")
+    lines.append("=" * 70)
+    lines.append("  ORÁCULO FISCAL SIMULADO — SEFAZ / RFB")
+    lines.append("  Split Payment Tributário — LC 214/2025")
+    lines.append("  Prova de Conceito — Fevereiro/2026")
+    lines.append("=" * 70)
+    sys.stdout.write("\n".join(lines) + "\n")
+
+
+def print_standard_report(result: SignedInvoice):
+    tax_details = result.tax
+    lines = []
+    lines.append("")
+    lines.append("-" * 70)
+    lines.append(f"  AUTORIZAÇÃO DE SPLIT PADRÃO (Art. 32)")
+    lines.append("-" * 70)
+    lines.append(f"  NF-e:                {result.invoice_id}")
+    lines.append(f"  Vendedor:            {result.seller[:10]}...{result.seller[-8:]}")
+    lines.append(f"  Timestamp:           {result.timestamp}")
+    lines.append(f"  Setor:               {tax_details['sector']}")
+    lines.append("")
+    lines.append(f"  Valor bruto:         {wei_to_brl(result.gross_amount)}")
+    lines.append(f"  ├─ CBS (União):      {wei_to_brl(result.cbs_amount)}")
+    lines.append(f"  ├─ IBS Estado:       {wei_to_brl(result.ibs_state_amount)}")
+    lines.append(f"  ├─ IBS Município:    {wei_to_brl(result.ibs_city_amount)}")
     total_tax = result.cbs_amount + result.ibs_state_amount + result.ibs_city_amount
-    print(f"  ├─ Total tributo:    {wei_to_brl(total_tax)}")
-    print(f"  ├─ Créditos comp.:   {wei_to_brl(result.credit_offset)}")
+    lines.append(f"  ├─ Total tributo:    {wei_to_brl(total_tax)}")
+    lines.append(f"  ├─ Créditos comp.:   {wei_to_brl(result.credit_offset)}")
     net_tax = total_tax - result.credit_offset
-    print(f"  ├─ Tributo líquido:  {wei_to_brl(net_tax)}")
+    lines.append(f"  ├─ Tributo líquido:  {wei_to_brl(net_tax)}")
     net_seller = result.gross_amount - net_tax
-    print(f"  └─ Vendedor recebe:  {wei_to_brl(net_seller)}")
-    print()
-    print(f"  Alíquota efetiva:    {tax_details['effective_rate']*100:.2f}%")
-    print(f"  Assinatura:          {result.signature[:20]}...{result.signature[-16:]}")
-    print(f"  Oráculo:             {result.signer_address[:10]}...{result.signer_address[-8:]}")
-    print("-" * 70)
-
-
-def print_simplified_report(result: SignedInvoice, tax_details: Dict):
-    print()
-    print("-" * 70)
-    print(f"  AUTORIZAÇÃO DE SPLIT SIMPLIFICADO (Art. 33)")
-    print("-" * 70)
-    print(f"  NF-e:                {result.invoice_id}")
-    print(f"  Vendedor:            {result.seller[:10]}...{result.seller[-8:]}")
-    print(f"  Timestamp:           {result.timestamp}")
-    print(f"  Setor:               {tax_details['sector']}")
-    print()
-    print(f"  Valor bruto:         {wei_to_brl(result.gross_amount)}")
-    print(f"  Alíquota fixa:       {result.rate_bps/100:.2f}%")
-    print(f"  ├─ Tributo retido:   {wei_to_brl(tax_details['tax_amount'])}")
-    print(f"  └─ Vendedor recebe:  {wei_to_brl(tax_details['net_to_seller'])}")
-    print()
-    print(f"  Destino tributo:     Conta de conciliação (repartição a posteriori)")
-    print(f"  Assinatura:          {result.signature[:20]}...{result.signature[-16:]}")
-    print(f"  Oráculo:             {result.signer_address[:10]}...{result.signer_address[-8:]}")
-    print("-" * 70)
+    lines.append(f"  └─ Vendedor recebe:  {wei_to_brl(net_seller)}")
+    lines.append("")
+    lines.append(f"  Alíquota efetiva:    {tax_details['effective_rate']*100:.2f}%")
+    lines.append(f"  Assinatura:          {result.signature[:20]}...{result.signature[-16:]}")
+    lines.append(f"  Oráculo:             {result.signer_address[:10]}...{result.signer_address[-8:]}")
+    lines.append("-" * 70)
+    sys.stdout.write("\n".join(lines) + "\n")
+
+
+def print_simplified_report(result: SignedInvoice):
+    tax_details = result.tax
+    lines = []
+    lines.append("")
+    lines.append("-" * 70)
+    lines.append(f"  AUTORIZAÇÃO DE SPLIT SIMPLIFICADO (Art. 33)")
+    lines.append("-" * 70)
+    lines.append(f"  NF-e:                {result.invoice_id}")
+    lines.append(f"  Vendedor:            {result.seller[:10]}...{result.seller[-8:]}")
+    lines.append(f"  Timestamp:           {result.timestamp}")
+    lines.append(f"  Setor:               {tax_details['sector']}")
+    lines.append("")
+    lines.append(f"  Valor bruto:         {wei_to_brl(result.gross_amount)}")
+    lines.append(f"  Alíquota fixa:       {result.rate_bps/100:.2f}%")
+    lines.append(f"  ├─ Tributo retido:   {wei_to_brl(tax_details['tax_amount'])}")
+    lines.append(f"  └─ Vendedor recebe:  {wei_to_brl(tax_details['net_to_seller'])}")
+    lines.append("")
+    lines.append(f"  Destino tributo:     Conta de conciliação (repartição a posteriori)")
+    lines.append(f"  Assinatura:          {result.signature[:20]}...{result.signature[-16:]}")
+    lines.append(f"  Oráculo:             {result.signer_address[:10]}...{result.signer_address[-8:]}")
+    lines.append("-" * 70)
+    sys.stdout.write("\n".join(lines) + "\n")
 
 
 def print_fraud_demo(oracle: FiscalOracle):
-    print()
-    print("-" * 70)
-    print("  DEMONSTRAÇÃO DE SEGURANÇA — TENTATIVA DE FRAUDE")
-    print("-" * 70)
-    print()
-    print("  Cenário: Comprador tenta submeter ao contrato inteligente os")
-    print("  mesmos dados, mas com CBS alterada de R$ 86,50 para R$ 0,00.")
-    print()
-    print("  O que acontece:")
-    print("  1. O contrato recalcula o hash dos dados RECEBIDOS")
-    print("  2. Compara com a assinatura do oráculo (dados ORIGINAIS)")
-    print("  3. Hashes divergem → ECDSA.recover retorna endereço errado")
-    print("  4. Endereço não tem FISCAL_ORACLE_ROLE → REVERT")
-    print()
-    print("  Resultado: Transação REJEITADA automaticamente.")
-    print("  Mensagem:  'Assinatura fiscal invalida'")
-    print()
-    print("  Conclusão: Sonegação por inadimplência = tecnicamente impossível")
-    print("-" * 70)
+    lines = []
+    lines.append("")
+    lines.append("-" * 70)
+    lines.append("  DEMONSTRAÇÃO DE SEGURANÇA — TENTATIVA DE FRAUDE")
+    lines.append("-" * 70)
+    lines.append("")
+    lines.append("  Cenário: Comprador tenta submeter ao contrato inteligente os")
+    lines.append("  mesmos dados, mas com CBS alterada de R$ 86,50 para R$ 0,00.")
+    lines.append("")
+    lines.append("  O que acontece:")
+    lines.append("  1. O contrato recalcula o hash dos dados RECEBIDOS")
+    lines.append("  2. Compara com a assinatura do oráculo (dados ORIGINAIS)")
+    lines.append("  3. Hashes divergem → ECDSA.recover retorna endereço errado")
+    lines.append("  4. Endereço não tem FISCAL_ORACLE_ROLE → REVERT")
+    lines.append("")
+    lines.append("  Resultado: Transação REJEITADA automaticamente.")
+    lines.append("  Mensagem:  'Assinatura fiscal invalida'")
+    lines.append("")
+    lines.append("  Conclusão: Sonegação por inadimplência = tecnicamente impossível")
+    lines.append("-" * 70)
+    sys.stdout.write("\n".join(lines) + "\n")
 
 
 # ============================================================================
@@ -392,10 +791,10 @@ def main():
 
     # Endereço de vendedor simulado
     vendedor = "0x1234567890123456789012345678901234567890"
+    oracle.warm_up([vendedor])
 
     # ── CENÁRIO 1: Split Padrão (B2B) — R$ 1.000,00 ──
     valor_1 = Web3.to_wei(1000, 'ether')
-    tax_1 = TaxEngine.calculate_standard(valor_1, "PADRAO", seller_credits_wei=0)
     auth_1 = oracle.authorize_standard(
         invoice_id="NFe35260112345678000195550010000000011234567890",
         seller_address=vendedor,
@@ -403,11 +802,10 @@ def main():
         sector="PADRAO",
         seller_credits_wei=0,
     )
-    print_standard_report(auth_1, tax_1)
+    print_standard_report(auth_1)
 
     # ── CENÁRIO 2: Split Padrão com Créditos — R$ 1.000,00, R$ 50 créditos ──
     creditos = Web3.to_wei(50, 'ether')
-    tax_2 = TaxEngine.calculate_standard(valor_1, "PADRAO", seller_credits_wei=creditos)
     auth_2 = oracle.authorize_standard(
         invoice_id="NFe35260112345678000195550010000000021234567890",
         seller_address=vendedor,
@@ -415,38 +813,35 @@ def main():
         sector="PADRAO",
         seller_credits_wei=creditos,
     )
-    print_standard_report(auth_2, tax_2)
+    print_standard_report(auth_2)
 
     # ── CENÁRIO 3: Split Padrão — Setor Saúde (alíquota reduzida) ──
-    tax_3 = TaxEngine.calculate_standard(valor_1, "SAUDE")
     auth_3 = oracle.authorize_standard(
         invoice_id="NFe35260112345678000195550010000000031234567890",
         seller_address=vendedor,
         gross_amount_wei=valor_1,
         sector="SAUDE",
     )
-    print_standard_report(auth_3, tax_3)
+    print_standard_report(auth_3)
 
     # ── CENÁRIO 4: Split Simplificado (B2C) — Varejo R$ 200,00 ──
     valor_4 = Web3.to_wei(200, 'ether')
-    tax_4 = TaxEngine.calculate_simplified(valor_4, "PADRAO")
     auth_4 = oracle.authorize_simplified(
         invoice_id="NFe35260112345678000195650010000000041234567890",
         seller_address=vendedor,
         gross_amount_wei=valor_4,
         sector="PADRAO",
     )
-    print_simplified_report(auth_4, tax_4)
+    print_simplified_report(auth_4)
 
     # ── CENÁRIO 5: Split Simplificado — Cesta Básica (isento) ──
-    tax_5 = TaxEngine.calculate_simplified(valor_4, "CESTA_BASICA")
     auth_5 = oracle.authorize_simplified(
         invoice_id="NFe35260112345678000195650010000000051234567890",
         seller_address=vendedor,
         gross_amount_wei=valor_4,
         sector="CESTA_BASICA",
     )
-    print_simplified_report(auth_5, tax_5)
+    print_simplified_report(auth_5)
 
     # ── CENÁRIO 6: Demonstração de segurança ──
     print_fraud_demo(oracle)